@@ -6,17 +6,47 @@ Paimon.moe ローカルデータ → UIGF v3 → UIGF v4.1 変換パイプライ
 """
 
 import argparse
+import asyncio
 import json
 import os
 import re
+import tempfile
+import time
 from datetime import datetime
-from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import requests
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # ディレクトリ・ファイルパス定義
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 RANK_OVERRIDE_FILE = os.path.join(SCRIPT_DIR, "rank-override.json")
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "pmoe-uigf")
+
+# API キャッシュの有効期限（秒）
+CACHE_TTL = 86400
+
+# これより大きい UIGF v3 JSON は ijson でストリーミング読み込みする（バイト）
+STREAMING_THRESHOLD_BYTES = 10 * 1024 * 1024
+
+# これより多いレコードを持つ UIGF v4.1 はレコード単位で逐次書き出す
+STREAMING_WRITE_THRESHOLD = 20000
 
 # API URL 定義
 API_URLS = {
@@ -29,6 +59,17 @@ API_URLS = {
     "genshin_words": "https://dataset.genshin-dictionary.com/words.json",
 }
 
+# API 取得結果のトップレベルの型
+API_RESULT_TYPES = {
+    "weapons_en": dict,
+    "weapons_ja": dict,
+    "characters_en": dict,
+    "characters_ja": dict,
+    "uigf_dict_en": dict,
+    "uigf_dict_ja": dict,
+    "genshin_words": list,
+}
+
 # まずは英語と日本語に限定
 LANG_MAP = {
     "ja": "ja-jp", "en": "en-us",
@@ -38,6 +79,10 @@ LANG_MAP = {
 #    "vi": "vi-vn", "zh-cn": "zh-cn", "zh-tw": "zh-tw",
 }
 
+# item_type の表記（日本語ロケールでは日本語表記を使う）
+ITEM_TYPE_MAP_JA = {"weapon": "武器", "character": "キャラクター"}
+ITEM_TYPE_MAP_EN = {"weapon": "Weapon", "character": "Character"}
+
 GACHA_BANNER_TYPES = [
     ("wish-counter-beginners", 100),
     ("wish-counter-character-event", 301),
@@ -46,109 +91,295 @@ GACHA_BANNER_TYPES = [
     ("wish-counter-chronicled", 500),
 ]
 
+# 英語名の空白正規化用パターン
+_WS_RE = re.compile(r"\s+")
+
+# 時刻文字列の書式（int() が許容する符号・空白・"_" を弾くため ASCII 数字に限定）
+_TIME_RE = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}", re.ASCII)
+
+# rank-override の上書き値 (name_en, name_jp, rank_type)
+RankOverride = Tuple[Optional[str], Optional[str], Optional[str]]
+
+# Paimon.moe 辞書のエントリ (rarity, name_en, name_jp)
+PmoeEntry = Tuple[Optional[str], str, str]
+PMOE_EMPTY_ENTRY: PmoeEntry = (None, "", "")
+
 # ===== ユーティリティ =====
 
+@lru_cache(maxsize=4096)
 def normalize_en_key(s: str) -> str:
     """英語名を正規化（比較用）"""
     if not s:
         return ""
-    return re.sub(r"\s+", " ", s.replace("_", " ")).strip().lower()
+    return _WS_RE.sub(" ", s.replace("_", " ")).strip().lower()
+
+def _as_str(value: Any) -> str:
+    """既に文字列ならそのまま返し、それ以外は str() で変換"""
+    return value if type(value) is str else str(value)
 
+@lru_cache(maxsize=4096)
 def english_from_pmoe_id(pmoe_id: str) -> str:
     """pmoe_id から英語名を推測"""
     norm = normalize_en_key(pmoe_id)
     return " ".join(w.capitalize() for w in norm.split()) if norm else ""
 
+# 10連の祈願は同一時刻のレコードが連続するため、結果をメモ化する
+@lru_cache(maxsize=256)
 def parse_time(time_str: str) -> Optional[datetime]:
-    """時刻文字列をパース"""
+    """時刻文字列（YYYY-MM-DD HH:MM:SS 固定長）をパース"""
+    # strptime は低速なため、書式だけ確認して固定位置のスライスで直接組み立てる
+    if not isinstance(time_str, str) or not _TIME_RE.fullmatch(time_str):
+        return None
     try:
-        return datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S")
-    except (ValueError, TypeError):
+        return datetime(
+            int(time_str[0:4]), int(time_str[5:7]), int(time_str[8:10]),
+            int(time_str[11:13]), int(time_str[14:16]), int(time_str[17:19]),
+        )
+    except ValueError:
         return None
 
+def _json_loads(data: bytes) -> Any:
+    """JSON バイト列をパース（orjson があれば優先して使用）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def _json_dumps(data: Any, indent: bool = False) -> bytes:
+    """JSON を UTF-8 バイト列に変換（orjson があれば優先して使用）"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
 # ===== API取得（並列化） =====
 
-def fetch_json(url: str, timeout: int = 10) -> dict:
-    """JSON をURLから取得"""
+def _get_json(url: str, timeout: int = 10, session: Optional[requests.Session] = None) -> Any:
+    """JSON をURLから取得（失敗時は例外を送出）"""
+    resp = (session or requests).get(url, timeout=timeout)
+    resp.raise_for_status()
+    return _json_loads(resp.content)
+
+def _read_cache(cache_path: str, ttl: Optional[int]) -> Optional[Any]:
+    """キャッシュを読み込む（ttl が None の場合は期限切れでも返す）"""
     try:
-        resp = requests.get(url, timeout=timeout)
+        if ttl is not None and time.time() - os.path.getmtime(cache_path) > ttl:
+            return None
+        with open(cache_path, "rb") as f:
+            return _json_loads(f.read())
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def _write_cache(cache_path: str, data: Any):
+    """キャッシュを書き込む（一時ファイル経由でアトミックに置き換え）"""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_json_dumps(data))
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    except OSError as e:
+        print(f"警告: キャッシュの書き込みに失敗: {cache_path} - {e}")
+
+def _cache_path(key: str) -> str:
+    """API キャッシュのファイルパス"""
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def _fallback_to_cache(key: str, url: str, error: Exception, use_cache: bool) -> dict:
+    """取得失敗時は期限切れのキャッシュでも利用する"""
+    stale = _read_cache(_cache_path(key), None) if use_cache else None
+    if stale is not None:
+        print(f"警告: {url} の取得に失敗したためキャッシュを使用します: {error}")
+        return stale
+    print(f"警告: {url} の取得に失敗: {error}")
+    return {}
+
+def _read_fresh_cache(key: str, ttl: int, use_cache: bool, refresh: bool) -> Optional[Any]:
+    """有効期限内のキャッシュがあれば返す"""
+    if not use_cache or refresh:
+        return None
+    return _read_cache(_cache_path(key), ttl)
+
+def _store_cache(key: str, data: Any, use_cache: bool) -> Any:
+    """取得したデータをキャッシュに保存してそのまま返す"""
+    if use_cache:
+        _write_cache(_cache_path(key), data)
+    return data
+
+def fetch_json_cached(
+    key: str, url: str, ttl: int = CACHE_TTL, timeout: int = 10,
+    session: Optional[requests.Session] = None, use_cache: bool = True, refresh: bool = False
+) -> dict:
+    """ディスクキャッシュ付きで JSON をURLから取得"""
+    cached = _read_fresh_cache(key, ttl, use_cache, refresh)
+    if cached is not None:
+        return cached
+    try:
+        return _store_cache(key, _get_json(url, timeout=timeout, session=session), use_cache)
+    except Exception as e:
+        return _fallback_to_cache(key, url, e, use_cache)
+
+async def _get_json_async(session: "aiohttp.ClientSession", url: str, timeout: int = 10) -> Any:
+    """_get_json の aiohttp 版（失敗時は例外を送出）"""
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
         resp.raise_for_status()
-        return resp.json()
+        return _json_loads(await resp.read())
+
+async def _fetch_json_cached_async(
+    session: "aiohttp.ClientSession", key: str, url: str, ttl: int = CACHE_TTL,
+    timeout: int = 10, use_cache: bool = True, refresh: bool = False
+) -> dict:
+    """fetch_json_cached の aiohttp 版"""
+    cached = _read_fresh_cache(key, ttl, use_cache, refresh)
+    if cached is not None:
+        return cached
+    try:
+        return _store_cache(key, await _get_json_async(session, url, timeout), use_cache)
     except Exception as e:
-        print(f"警告: {url} の取得に失敗: {e}")
-        return {}
+        return _fallback_to_cache(key, url, e, use_cache)
+
+async def _fetch_apis_async(use_cache: bool, refresh_cache: bool) -> Dict[str, Any]:
+    """単一のイベントループ・セッションで全APIを同時取得"""
+    connector = aiohttp.TCPConnector(limit=8, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        keys = list(API_URLS)
+        values = await asyncio.gather(*(
+            _fetch_json_cached_async(
+                session, key, API_URLS[key], use_cache=use_cache, refresh=refresh_cache
+            )
+            for key in keys
+        ))
+    return dict(zip(keys, values))
 
-def fetch_apis_parallel() -> Dict[str, Any]:
-    """複数のAPI呼び出しを並列実行"""
+def fetch_apis_parallel(use_cache: bool = True, refresh_cache: bool = False) -> Dict[str, Any]:
+    """複数のAPI呼び出しを並列実行（aiohttp が無ければスレッドで並列化）"""
+    if aiohttp is not None:
+        return asyncio.run(_fetch_apis_async(use_cache, refresh_cache))
+    
     results = {}
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        futures = {executor.submit(fetch_json, url): key for key, url in API_URLS.items()}
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=6) as executor:
+        futures = {
+            executor.submit(
+                fetch_json_cached, key, url,
+                session=session, use_cache=use_cache, refresh=refresh_cache,
+            ): key
+            for key, url in API_URLS.items()
+        }
         for future in as_completed(futures):
             key = futures[future]
             results[key] = future.result()
     return results
 
-def build_pmoe_dict(api_results: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
-    """Paimon.moe 辞書を構築"""
+def sanity_check_api_results(api_results: Dict[str, Any]) -> Dict[str, Any]:
+    """API 取得結果のトップレベルの型を一度だけ検証（不正なものは空に置き換える）"""
+    for key, expected_type in API_RESULT_TYPES.items():
+        data = api_results.get(key)
+        if not isinstance(data, expected_type):
+            if data:
+                print(f"警告: {key} の形式が不正なため無視します: {type(data).__name__}")
+            api_results[key] = expected_type()
+    return api_results
+
+def build_pmoe_dict(api_results: Dict[str, Any]) -> Dict[str, PmoeEntry]:
+    """Paimon.moe 辞書を構築（api_results は sanity_check_api_results 済みであること）"""
     pmoe = {}
-    for key in ("weapons_en", "weapons_ja", "characters_en", "characters_ja"):
-        lang = "en" if "en" in key else "jp"
-        data = api_results.get(key, {})
-        for pmoe_id, info in data.items():
-            if not isinstance(info, dict):
-                continue
-            entry = pmoe.setdefault(pmoe_id, {})
-            if "name" in info and f"name_{lang}" not in entry:
-                entry[f"name_{lang}"] = info["name"]
-            if "rarity" in info and "rarity" not in entry:
-                entry["rarity"] = info["rarity"]
-    return pmoe
-
-def build_genshin_words_maps(gd_data: dict) -> Dict[str, Dict[str, str]]:
-    """Genshin Dictionary マップを構築"""
-    maps = {"en_to_ja": {}, "en_to_ja_norm": {}, "zh_to_ja": {}}
-    if not isinstance(gd_data, list):
-        return maps
+    skipped = 0
+    for key, name_key in (
+        ("weapons_en", "name_en"), ("weapons_ja", "name_jp"),
+        ("characters_en", "name_en"), ("characters_ja", "name_jp"),
+    ):
+        for pmoe_id, info in api_results.get(key, {}).items():
+            # 項目ごとの型チェックは行わず、想定外の項目は例外で読み飛ばす
+            try:
+                entry = pmoe.setdefault(pmoe_id, {})
+                if "name" in info and name_key not in entry:
+                    entry[name_key] = info["name"]
+                if "rarity" in info and "rarity" not in entry:
+                    entry["rarity"] = info["rarity"]
+            except (TypeError, KeyError):
+                skipped += 1
+    if skipped:
+        print(f"警告: Paimon.moe 辞書の不正な項目を {skipped} 件読み飛ばしました")
+    
+    # 参照側で毎回変換しなくて済むよう、rarity を文字列化したタプルにまとめる
+    return {
+        pmoe_id: (
+            str(r) if isinstance(r := entry.get("rarity"), (int, str)) else None,
+            entry.get("name_en") or "",
+            entry.get("name_jp", ""),
+        )
+        for pmoe_id, entry in pmoe.items()
+    }
+
+def build_genshin_words_maps(gd_data: List[Dict[str, Any]]) -> Dict[str, Dict[str, str]]:
+    """Genshin Dictionary マップを構築（gd_data は sanity_check_api_results 済みであること）"""
+    en_to_ja: Dict[str, str] = {}
+    en_to_ja_norm: Dict[str, str] = {}
+    zh_to_ja: Dict[str, str] = {}
+    maps = {"en_to_ja": en_to_ja, "en_to_ja_norm": en_to_ja_norm, "zh_to_ja": zh_to_ja}
     
+    # 単語数が多いため、normalize_en_key は呼ばずにインライン展開する
+    ws_sub = _WS_RE.sub
+    skipped = 0
     for w in gd_data:
-        if not isinstance(w, dict) or "ja" not in w:
-            continue
-        ja = w["ja"]
-        
-        if "en" in w:
-            maps["en_to_ja"][w["en"]] = ja
-            norm_key = normalize_en_key(w["en"])
-            if norm_key:
-                maps["en_to_ja_norm"][norm_key] = ja
-        
-        if "zhCN" in w:
-            maps["zh_to_ja"][w["zhCN"]] = ja
+        # 項目ごとの型チェックは行わず、想定外の項目は例外で読み飛ばす
+        try:
+            ja = w.get("ja")
+            if ja is None:
+                continue
+            
+            en = w.get("en")
+            if en:
+                en_to_ja[en] = ja
+                norm_key = ws_sub(" ", en.replace("_", " ")).strip().lower()
+                if norm_key:
+                    en_to_ja_norm[norm_key] = ja
+            
+            zh = w.get("zhCN")
+            if zh:
+                zh_to_ja[zh] = ja
+        except (AttributeError, TypeError):
+            skipped += 1
+    if skipped:
+        print(f"警告: Genshin Dictionary の不正な項目を {skipped} 件読み飛ばしました")
     
     return maps
 
 # ===== ランク・アイテム情報 =====
 
-def get_item_names_from_pmoe_id(pmoe_id: str, pmoe_dict: dict) -> Tuple[str, str]:
-    """pmoe_id から英語名・日本語名を取得"""
-    data = pmoe_dict.get(pmoe_id, {})
-    return data.get("name_en") or data.get("name", ""), data.get("name_jp", "")
-
-def get_rank_from_pmoe_id(pmoe_id: str, pmoe_dict: dict) -> Optional[str]:
-    """pmoe_id から rarity を取得"""
-    data = pmoe_dict.get(pmoe_id, {})
-    r = data.get("rarity")
-    return str(r) if isinstance(r, (int, str)) else None
-
-def get_item_id_from_name(name: str, uigf_dict: dict) -> str:
-    """名前から item_id を取得"""
-    return str(uigf_dict.get(name, 0))
+def build_item_id_index(uigf_dict: Dict[str, Any]) -> Dict[str, Any]:
+    """名前 → item_id の索引を構築（元の名前に加え、正規化した名前でも引ける）"""
+    index = dict(uigf_dict)
+    # 辞書の全件で normalize_en_key の LRU キャッシュを押し流さないよう、インライン展開する
+    ws_sub = _WS_RE.sub
+    for name, item_id in uigf_dict.items():
+        if norm_key := ws_sub(" ", name.replace("_", " ")).strip().lower():
+            index.setdefault(norm_key, item_id)
+    return index
+
+def get_item_id_from_names(
+    item_name_en: str, item_name_jp: str, raw_name: str,
+    id_index_en: Dict[str, Any], id_index_ja: Dict[str, Any]
+) -> str:
+    """名前から item_id を取得（英語名 → 日本語名 → 元の名前の順に検索）"""
+    item_id = (
+        id_index_en.get(item_name_en)
+        or id_index_en.get(normalize_en_key(item_name_en))
+        or id_index_ja.get(item_name_jp)
+    )
+    if not item_id and raw_name:
+        item_id = id_index_en.get(raw_name) or id_index_ja.get(raw_name)
+    return str(item_id or 0)
 
 def resolve_item_name(
-    pmoe_id: str, raw_name: str, pmoe_dict: dict, 
+    pmoe_id: str, raw_name: str, pmoe_dict: Dict[str, PmoeEntry], 
     gd_maps: Dict[str, Dict[str, str]], locale: str
 ) -> Tuple[str, str]:
     """アイテム名を複合的に解決"""
-    item_name_en, item_name_jp = get_item_names_from_pmoe_id(pmoe_id, pmoe_dict)
+    _, item_name_en, item_name_jp = pmoe_dict.get(pmoe_id, PMOE_EMPTY_ENTRY)
     derived_en = english_from_pmoe_id(pmoe_id)
     
     en_to_ja = gd_maps.get("en_to_ja", {})
@@ -179,21 +410,28 @@ def resolve_item_name(
     
     return item_name_en, item_name_jp
 
+def _normalize_override_item(item: Dict[str, Any]) -> RankOverride:
+    """rank-override の項目を (name_en, name_jp, rank_type) に正規化（空欄は None）"""
+    return tuple(
+        str(v).strip() if (v := item.get(k)) else None
+        for k in ("name_en", "name_jp", "rank_type")
+    )
+
 def apply_rank_override(
     pmoe_id: str, item_name_en: str, item_name_jp: str, rank_type: Optional[str],
-    override_map: Dict[str, Dict[str, Any]]
+    override_map: Dict[str, RankOverride]
 ) -> Tuple[str, str, Optional[str]]:
     """rank-override を適用"""
-    override = override_map.get(pmoe_id)
-    if not override:
+    if pmoe_id not in override_map:
         return item_name_en, item_name_jp, rank_type
     
-    if o_name := override.get("name_en"):
-        item_name_en = str(o_name).strip()
-    if o_name := override.get("name_jp"):
-        item_name_jp = str(o_name).strip()
-    if o_rank := override.get("rank_type"):
-        rank_type = str(o_rank).strip()
+    o_name_en, o_name_jp, o_rank = override_map[pmoe_id]
+    if o_name_en is not None:
+        item_name_en = o_name_en
+    if o_name_jp is not None:
+        item_name_jp = o_name_jp
+    if o_rank is not None:
+        rank_type = o_rank
     
     return item_name_en, item_name_jp, rank_type
 
@@ -219,7 +457,8 @@ def to_uigf_gacha_type(gacha_type: str) -> str:
 
 def build_uigf_record(
     pull: dict, gacha_type: str, pmoe_id: str, item_name_en: str, 
-    item_name_jp: str, item_id: str, rank_type: Optional[str], rec_id: str, lang: str = "en-us"
+    item_name_jp: str, item_id: str, rank_type: Optional[str], rec_id: int,
+    item_type_map: Dict[str, str] = ITEM_TYPE_MAP_EN, display_prefers_jp: bool = False
 ) -> Optional[dict]:
     """ガチャレコードを構築"""
     time_str = str(pull.get("time", ""))
@@ -227,25 +466,20 @@ def build_uigf_record(
         return None
     
     # 言語が ja-jp の場合は item_name_jp を優先
-    display_name = item_name_jp if lang == "ja-jp" else (item_name_en or item_name_jp)
+    display_name = item_name_jp if display_prefers_jp else (item_name_en or item_name_jp)
     
     entry = {
         "uigf_gacha_type": to_uigf_gacha_type(gacha_type),
         "gacha_type": gacha_type,
         "item_id": item_id,
         "time": time_str,
-        "id": rec_id,
+        "id": str(rec_id),
         "count": "1",
         "name": display_name or str(pull.get("name", "")),
     }
     
-    p_type = str(pull.get("type", "")).lower()
-    if p_type in ("weapon", "character"):
-        # 日本語ロケールでは日本語表記を使う
-        if str(lang).lower() == "ja-jp":
-            entry["item_type"] = "武器" if p_type == "weapon" else "キャラクター"
-        else:
-            entry["item_type"] = p_type.capitalize()
+    if item_type := item_type_map.get(str(pull.get("type", "")).lower()):
+        entry["item_type"] = item_type
     
     if rank_type:
         entry["rank_type"] = rank_type
@@ -256,24 +490,46 @@ def paimon_to_uigf_v3(
     paimon_data: Dict[str, Any],
     export_app: str = "PMOE-Local-Converter",
     export_app_version: str = "1.0.2",
-    rank_override_map: Optional[Dict[str, Dict[str, Any]]] = None,
+    rank_override_map: Optional[Dict[str, RankOverride]] = None,
+    use_cache: bool = True,
+    refresh_cache: bool = False,
 ) -> Tuple[Dict[str, Any], Dict[str, Dict[str, str]]]:
     """Paimon → UIGF v3"""
     if rank_override_map is None:
         rank_override_map = {}
     
     # API並列取得
-    api_results = fetch_apis_parallel()
+    api_results = sanity_check_api_results(
+        fetch_apis_parallel(use_cache=use_cache, refresh_cache=refresh_cache)
+    )
     pmoe_dict = build_pmoe_dict(api_results)
-    uigf_dict = api_results.get("uigf_dict", {})
+    id_index_en = build_item_id_index(api_results.get("uigf_dict_en", {}))
+    id_index_ja = build_item_id_index(api_results.get("uigf_dict_ja", {}))
     gd_maps = build_genshin_words_maps(api_results.get("genshin_words", []))
     
     # 基本情報
     uid = str(paimon_data.get("wish-uid") or paimon_data.get("uid") or "0")
     locale = paimon_data.get("locale") or "en"
+    
     lang = infer_lang_from_locale(locale)
     region_time_zone = infer_timezone_from_uid(uid)
     
+    # ロケール依存の表記はループ外で確定させる
+    display_prefers_jp = lang == "ja-jp"
+    item_type_map = ITEM_TYPE_MAP_JA if display_prefers_jp else ITEM_TYPE_MAP_EN
+    
+    # 同一アイテムは何度も出現するため、pmoe_id 単位で解決結果をメモ化
+    @lru_cache(maxsize=None)
+    def _resolve_item(pmoe_id: str, raw_name: str) -> Tuple[str, str, str, Optional[str]]:
+        item_name_en, item_name_jp = resolve_item_name(
+            pmoe_id, raw_name, pmoe_dict, gd_maps, locale
+        )
+        item_id = get_item_id_from_names(
+            item_name_en, item_name_jp, raw_name, id_index_en, id_index_ja
+        )
+        rank_type = pmoe_dict.get(pmoe_id, PMOE_EMPTY_ENTRY)[0]
+        return item_name_en, item_name_jp, item_id, rank_type
+    
     now = datetime.now()
     export_timestamp = int(now.timestamp())
     export_time = now.strftime("%Y-%m-%d %H:%M:%S")
@@ -281,38 +537,30 @@ def paimon_to_uigf_v3(
     # レコード構築
     uigf_list = []
     missing_rank: Dict[str, Dict[str, str]] = {}
-    synth_id = int(f"{uid}000000") if uid.isdigit() else int(datetime.now().timestamp())
+    synth_id = int(uid) * 1_000_000 if uid.isdigit() else int(datetime.now().timestamp())
     
     for counter_key, gacha_type_int in GACHA_BANNER_TYPES:
         counter = paimon_data.get(counter_key)
         if not isinstance(counter, dict):
             continue
         
+        gacha_type = str(gacha_type_int)
         pulls = counter.get("pulls") or []
         for p in pulls:
             pmoe_id = str(p.get("id", ""))
             raw_name = str(p.get("name", ""))
-            gacha_type = str(gacha_type_int)
-            
-            item_name_en, item_name_jp = resolve_item_name(
-                pmoe_id, raw_name, pmoe_dict, gd_maps, locale
-            )
             
-            item_id = get_item_id_from_name(item_name_en, uigf_dict)
-            if item_id == "0" and raw_name:
-                item_id = get_item_id_from_name(raw_name, uigf_dict)
+            item_name_en, item_name_jp, item_id, rank_type = _resolve_item(pmoe_id, raw_name)
             
-            rank_type = get_rank_from_pmoe_id(pmoe_id, pmoe_dict)
             item_name_en, item_name_jp, rank_type = apply_rank_override(
                 pmoe_id, item_name_en, item_name_jp, rank_type, rank_override_map
             )
             
             synth_id += 1
-            rec_id = str(synth_id)
             
             entry = build_uigf_record(
                 p, gacha_type, pmoe_id, item_name_en, item_name_jp,
-                item_id, rank_type, rec_id, lang
+                item_id, rank_type, synth_id, item_type_map, display_prefers_jp
             )
             
             if entry:
@@ -325,7 +573,7 @@ def paimon_to_uigf_v3(
                     "gacha_type": gacha_type,
                 }
     
-    uigf_list.sort(key=lambda e: (e["time"], e["id"]))
+    uigf_list.sort(key=itemgetter("time", "id"))
     
     uigf_v3 = {
         "info": {
@@ -343,75 +591,109 @@ def paimon_to_uigf_v3(
     
     return uigf_v3, missing_rank
 
+def paimon_to_uigf_v41_direct(
+    paimon_data: Dict[str, Any],
+    export_app: str = "PMOE-Local-Converter",
+    export_app_version: str = "1.0.2",
+    rank_override_map: Optional[Dict[str, RankOverride]] = None,
+    version: str = "v4.1",
+    use_cache: bool = True,
+    refresh_cache: bool = False,
+) -> Tuple[Dict[str, Any], Dict[str, Dict[str, str]]]:
+    """Paimon → UIGF v4.1（v3 レコードの再変換を省略）"""
+    if not version.startswith("v4.1"):
+        raise ValueError(f"未対応の UIGF バージョンです: {version}")
+    
+    # build_uigf_record のレコードは全フィールドが文字列・ソート済みで、
+    # そのまま v4.1 のレコードとして使えるため list をそのまま流用する
+    uigf_v3, missing_rank = paimon_to_uigf_v3(
+        paimon_data,
+        export_app=export_app,
+        export_app_version=export_app_version,
+        rank_override_map=rank_override_map,
+        use_cache=use_cache,
+        refresh_cache=refresh_cache,
+    )
+    return build_uigf_v41(uigf_v3["info"], uigf_v3["list"], version), missing_rank
+
 # ===== UIGF v3 → v4.x =====
 
-def uigf_v3_to_v41(uigf_v3: Dict[str, Any], version: str = "v4.1") -> Dict[str, Any]:
-    """UIGF v3 → v4.1"""
+def build_uigf_v41(
+    info_v3: Dict[str, Any], list_v41: List[Dict[str, Any]], version: str = "v4.1"
+) -> Dict[str, Any]:
+    """v3 の info と変換済みレコードから UIGF v4.1 を組み立てる"""
+    return {
+        "info": {
+            "export_timestamp": info_v3.get("export_timestamp"),
+            "export_app": info_v3.get("export_app"),
+            "export_app_version": info_v3.get("export_app_version"),
+            "version": version,
+        },
+        "hk4e": [
+            {
+                "uid": info_v3.get("uid", "0"),
+                "timezone": info_v3.get("region_time_zone", 8),
+                "lang": info_v3.get("lang", "en-us"),
+                "list": list_v41,
+            }
+        ],
+    }
+
+def uigf_v3_to_v41(
+    uigf_v3: Dict[str, Any], version: str = "v4.1", presorted: bool = False
+) -> Dict[str, Any]:
+    """UIGF v3 → v4.1（list は任意のイテラブル。presorted=True なら (time, id) 順である前提でソートを省略）"""
     info_v3 = uigf_v3.get("info", {})
     list_v3 = uigf_v3.get("list", [])
     
-    info_v41 = {
-        "export_timestamp": info_v3.get("export_timestamp"),
-        "export_app": info_v3.get("export_app"),
-        "export_app_version": info_v3.get("export_app_version"),
-        "version": version,
-    }
-    
     list_v41 = []
     for r in list_v3:
-        gacha_type = str(r.get("gacha_type", ""))
+        gacha_type = _as_str(r.get("gacha_type", ""))
         if not gacha_type or "time" not in r or "id" not in r:
             continue
         
         entry = {
-            "uigf_gacha_type": to_uigf_gacha_type(str(r.get("uigf_gacha_type", gacha_type))),
+            "uigf_gacha_type": to_uigf_gacha_type(_as_str(r.get("uigf_gacha_type", gacha_type))),
             "gacha_type": gacha_type,
-            "item_id": str(r.get("item_id", "")),
+            "item_id": _as_str(r.get("item_id", "")),
             "time": r["time"],
-            "id": str(r["id"]),
-            "count": str(r.get("count", "1")),
+            "id": _as_str(r["id"]),
+            "count": _as_str(r.get("count", "1")),
         }
         
         for k in ("name", "item_type", "rank_type"):
-            if k in r and r[k] is not None:
-                entry[k] = str(r[k])
+            if (v := r.get(k)) is not None:
+                entry[k] = _as_str(v)
         
         list_v41.append(entry)
     
-    list_v41.sort(key=lambda e: (e["time"], e["id"]))
+    if not presorted:
+        list_v41.sort(key=itemgetter("time", "id"))
     
-    return {
-        "info": info_v41,
-        "hk4e": [
-            {
-                "uid": info_v3.get("uid", "0"),
-                "timezone": info_v3.get("region_time_zone", 8),
-                "lang": info_v3.get("lang", "en-us"),
-                "list": list_v41,
-            }
-        ],
-    }
+    return build_uigf_v41(info_v3, list_v41, version)
 
-def uigf_v3_to_v4x(uigf_v3: Dict[str, Any], target_version: str = "v4.1") -> Dict[str, Any]:
+def uigf_v3_to_v4x(
+    uigf_v3: Dict[str, Any], target_version: str = "v4.1", presorted: bool = False
+) -> Dict[str, Any]:
     """将来の拡張を想定した v3→v4.x 入口"""
     if target_version.startswith("v4.1"):
-        return uigf_v3_to_v41(uigf_v3, version=target_version)
+        return uigf_v3_to_v41(uigf_v3, version=target_version, presorted=presorted)
     raise ValueError(f"未対応の UIGF バージョンです: {target_version}")
 
 # ===== CLI & ファイルI/O =====
 
-def load_rank_override() -> Dict[str, Dict[str, Any]]:
-    """rank-override.json を読み込む"""
+def load_rank_override() -> Dict[str, RankOverride]:
+    """rank-override.json を読み込む（値は正規化済みのタプル）"""
     rank_override_map = {}
     if not os.path.exists(RANK_OVERRIDE_FILE):
         return rank_override_map
     
     try:
-        with open(RANK_OVERRIDE_FILE, "r", encoding="utf-8") as f:
-            override_obj = json.load(f)
+        with open(RANK_OVERRIDE_FILE, "rb") as f:
+            override_obj = _json_loads(f.read())
         for item in override_obj.get("items", []):
             if pmoe_id := item.get("pmoe_id"):
-                rank_override_map[pmoe_id] = item
+                rank_override_map[pmoe_id] = _normalize_override_item(item)
         print(f"rank-override を {len(rank_override_map)} 件読み込みました")
     except (json.JSONDecodeError, OSError) as e:
         print(f"警告: rank-override.json の読み込みに失敗: {e}")
@@ -421,23 +703,106 @@ def load_rank_override() -> Dict[str, Dict[str, Any]]:
 def load_json_file(path: str) -> dict:
     """JSONファイルを読み込む"""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            return _json_loads(f.read())
     except FileNotFoundError:
         raise SystemExit(f"ファイルが見つかりません: {path}")
     except json.JSONDecodeError as e:
         raise SystemExit(f"JSON のパースに失敗しました: {path} - {e}")
 
+def _read_uigf_v3_info(f) -> Dict[str, Any]:
+    """info の終端までイベントを読み進めて info を構築（通常 info は先頭にあるため list は走査しない）"""
+    builder = None
+    for prefix, event, value in ijson.parse(f, use_float=True):
+        if builder is None:
+            if prefix == "info" and event == "start_map":
+                builder = ijson.ObjectBuilder()
+                builder.event(event, value)
+            continue
+        builder.event(event, value)
+        if prefix == "info" and event == "end_map":
+            return builder.value
+    return {}
+
+def iter_uigf_v3_records(path: str) -> Tuple[Dict[str, Any], Iterator[Dict[str, Any]]]:
+    """UIGF v3 JSON の info と、list のレコードを逐次返すイテレータを取得"""
+    try:
+        with open(path, "rb") as f:
+            info = _read_uigf_v3_info(f)
+    except FileNotFoundError:
+        raise SystemExit(f"ファイルが見つかりません: {path}")
+    except ijson.JSONError as e:
+        raise SystemExit(f"JSON のパースに失敗しました: {path} - {e}")
+    
+    def records() -> Iterator[Dict[str, Any]]:
+        try:
+            with open(path, "rb") as f:
+                yield from ijson.items(f, "list.item", use_float=True)
+        except ijson.JSONError as e:
+            raise SystemExit(f"JSON のパースに失敗しました: {path} - {e}")
+    
+    return info, records()
+
+def load_uigf_v3(path: str) -> Dict[str, Any]:
+    """UIGF v3 JSON を読み込む（大きなファイルは list をストリーミング）"""
+    if (
+        ijson is not None and os.path.isfile(path)
+        and os.path.getsize(path) > STREAMING_THRESHOLD_BYTES
+    ):
+        info, records = iter_uigf_v3_records(path)
+        return {"info": info, "list": records}
+    return load_json_file(path)
+
 def save_json_file(path: str, data: dict, description: str = ""):
     """JSONファイルを保存"""
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        with open(path, "wb") as f:
+            f.write(_json_dumps(data, indent=True))
         msg = f"{description} を出力しました: {path}"
         print(msg)
     except OSError as e:
         print(f"警告: ファイルの書き込みに失敗しました: {path} - {e}")
 
+def save_uigf_v41_streaming(
+    path: str, info: Dict[str, Any], uid: str, timezone: int, lang: str,
+    records_iter: Iterable[Dict[str, Any]], description: str = ""
+):
+    """UIGF v4.1 をレコード単位で逐次書き出す（出力は save_json_file と同一）"""
+    # list を空にした外枠をシリアライズし、末尾の "[]" の位置にレコードを差し込む
+    envelope = _json_dumps(
+        {"info": info, "hk4e": [{"uid": uid, "timezone": timezone, "lang": lang, "list": []}]},
+        indent=True,
+    )
+    head, tail = envelope.rsplit(b"[]", 1)
+    # hk4e[0].list の要素はインデント 8 桁
+    item_sep = b"\n        "
+    
+    try:
+        with open(path, "wb") as f:
+            f.write(head)
+            first = True
+            for r in records_iter:
+                f.write(b"[" if first else b",")
+                f.write(item_sep)
+                f.write(_json_dumps(r, indent=True).replace(b"\n", item_sep))
+                first = False
+            f.write(b"[]" if first else b"\n      ]")
+            f.write(tail)
+        print(f"{description} を出力しました: {path}")
+    except OSError as e:
+        print(f"警告: ファイルの書き込みに失敗しました: {path} - {e}")
+
+def save_uigf_v41(path: str, v41: Dict[str, Any], description: str = ""):
+    """UIGF v4.1 を保存（レコード数が多い場合は逐次書き出し）"""
+    hk4e = v41["hk4e"][0]
+    if len(hk4e["list"]) > STREAMING_WRITE_THRESHOLD:
+        save_uigf_v41_streaming(
+            path, v41["info"], hk4e["uid"], hk4e["timezone"], hk4e["lang"],
+            hk4e["list"], description,
+        )
+    else:
+        save_json_file(path, v41, description)
+
 def output_missing_rank(missing_rank: Dict[str, Dict[str, str]], output_path: str):
     """rank_type 不明アイテムを出力"""
     if not missing_rank or not output_path:
@@ -470,6 +835,8 @@ def main():
     parser.add_argument("--export-app", default="PMOE-Local-Converter")
     parser.add_argument("--export-app-version", default="1.0.0")
     parser.add_argument("--target-version", default="v4.1")
+    parser.add_argument("--no-cache", action="store_true", help="API レスポンスのキャッシュを使用しない")
+    parser.add_argument("--refresh-cache", action="store_true", help="API レスポンスのキャッシュを再取得する")
     
     args = parser.parse_args()
     
@@ -483,29 +850,40 @@ def main():
     rank_override_map = load_rank_override()
     
     uigf_v3 = None
+    v4x = None
     
-    # Paimon → v3
     if args.paimon:
         paimon_data = load_json_file(args.paimon)
-        uigf_v3, missing_rank = paimon_to_uigf_v3(
-            paimon_data,
+        convert_kwargs = dict(
             export_app=args.export_app,
             export_app_version=args.export_app_version,
             rank_override_map=rank_override_map,
+            use_cache=not args.no_cache,
+            refresh_cache=args.refresh_cache,
         )
         
         if args.v3_out:
+            # Paimon → v3（v3 も出力する場合）
+            uigf_v3, missing_rank = paimon_to_uigf_v3(paimon_data, **convert_kwargs)
             save_json_file(args.v3_out, uigf_v3, "UIGF v3 JSON")
+        else:
+            # Paimon → v4.x（中間の v3 変換を省略）
+            v4x, missing_rank = paimon_to_uigf_v41_direct(
+                paimon_data, version=args.target_version, **convert_kwargs
+            )
         
         output_missing_rank(missing_rank, args.missing_rank_out)
     
     # 既存 v3 を読み込む
     if args.from_v3:
-        uigf_v3 = load_json_file(args.from_v3)
+        uigf_v3 = load_uigf_v3(args.from_v3)
     
-    # v3 → v4.x
-    v4x = uigf_v3_to_v4x(uigf_v3, target_version=args.target_version)
-    save_json_file(args.output_v41, v4x, f"UIGF {args.target_version} JSON")
+    # v3 → v4.x（Paimon から生成した v3 は既にソート済み）
+    if v4x is None:
+        v4x = uigf_v3_to_v4x(
+            uigf_v3, target_version=args.target_version, presorted=bool(args.paimon)
+        )
+    save_uigf_v41(args.output_v41, v4x, f"UIGF {args.target_version} JSON")
 
 if __name__ == "__main__":
     main()
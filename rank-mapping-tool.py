@@ -16,14 +16,20 @@ import argparse
 import json
 from typing import Any, Dict, List, Set
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
 # ===== ファイルI/O =====
 
 def load_json(path: str) -> Any:
     """JSON ファイルを読み込む"""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            data = f.read()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
     except FileNotFoundError:
         raise SystemExit(f"ファイルが見つかりません: {path}")
     except json.JSONDecodeError as e:
@@ -33,8 +39,12 @@ def load_json(path: str) -> Any:
 def save_json(path: str, obj: Any) -> None:
     """JSON ファイルを保存"""
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(obj, f, ensure_ascii=False, indent=2)
+        if orjson is not None:
+            with open(path, "wb") as f:
+                f.write(orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(obj, f, ensure_ascii=False, indent=2)
     except OSError as e:
         raise SystemExit(f"ファイル保存に失敗しました: {path} - {e}")
 
@@ -44,16 +54,15 @@ def save_json(path: str, obj: Any) -> None:
 def extract_items_from_missing(missing_data: dict) -> List[Dict[str, Any]]:
     """missing-rank.json から items リストを抽出（重複排除済み）"""
     items = missing_data.get("items", [])
-    seen: Set[str] = set()
-    unique_items: List[Dict[str, Any]] = []
+    # dict は挿入順を保持するため、最初に出現した項目を残したまま重複排除できる
+    unique_items: Dict[str, Dict[str, Any]] = {}
     
     for item in items:
         pmoe_id = item.get("pmoe_id")
-        if pmoe_id and pmoe_id not in seen:
-            seen.add(pmoe_id)
-            unique_items.append(item)
+        if pmoe_id and pmoe_id not in unique_items:
+            unique_items[pmoe_id] = item
     
-    return unique_items
+    return list(unique_items.values())
 
 
 def get_existing_pmoe_ids(override_data: dict) -> Set[str]:
@@ -13,12 +13,29 @@ import sys
 from typing import Any, Dict
 
 try:
-    from jsonschema import validate
-    from jsonschema.exceptions import ValidationError
+    import orjson
 except ImportError:
-    print("エラー: jsonschema ライブラリがインストールされていません")
-    print("インストール: pip install jsonschema")
-    sys.exit(1)
+    orjson = None
+
+# fastjsonschema があればスキーマをコード生成で検証関数にコンパイルして使う
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+try:
+    from jsonschema import Draft202012Validator, FormatChecker
+    from jsonschema.exceptions import SchemaError, ValidationError
+except ImportError:
+    Draft202012Validator = None
+    if fastjsonschema is None:
+        print("エラー: jsonschema ライブラリがインストールされていません")
+        print("インストール: pip install jsonschema")
+        sys.exit(1)
+
+
+# fastjsonschema が対応している $schema（draft-04/06/07）
+FASTJSONSCHEMA_DRAFTS = ("draft-04", "draft-06", "draft-07")
 
 
 # ===== ファイルI/O =====
@@ -26,8 +43,9 @@ except ImportError:
 def load_json(path: str, description: str = "") -> dict:
     """JSON ファイルを読み込む"""
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            data = f.read()
+        return orjson.loads(data) if orjson is not None else json.loads(data)
     except FileNotFoundError:
         raise SystemExit(f"ファイルが見つかりません: {path}")
     except json.JSONDecodeError as e:
@@ -36,24 +54,69 @@ def load_json(path: str, description: str = "") -> dict:
 
 # ===== スキーマ検証 =====
 
-def validate_uigf(schema: Dict[str, Any], data: Dict[str, Any]) -> bool:
+def is_fastjsonschema_supported(schema: Dict[str, Any]) -> bool:
+    """スキーマの $schema が fastjsonschema の対応ドラフトか判定する"""
+    uri = str(schema.get("$schema", ""))
+    return any(f"json-schema.org/{draft}/schema" in uri for draft in FASTJSONSCHEMA_DRAFTS)
+
+
+def build_validator(schema: Dict[str, Any]) -> Any:
     """
-    UIGF v4.1 JSON をスキーマで検証する
+    スキーマからバリデータを構築する（複数ファイルの検証で使い回す）
+    
+    fastjsonschema は draft-04/06/07 のみ対応のため、公式スキーマ（2020-12）は
+    jsonschema の Draft202012Validator で検証する。
+    """
+    supported = is_fastjsonschema_supported(schema)
+    if fastjsonschema is not None and (supported or Draft202012Validator is None):
+        if not supported:
+            print(f"警告: fastjsonschema は {schema.get('$schema')} に未対応のため draft-07 として検証します")
+        try:
+            return fastjsonschema.compile(schema)
+        except fastjsonschema.JsonSchemaDefinitionException as e:
+            raise SystemExit(f"スキーマが不正です: {e}")
+    
+    try:
+        Draft202012Validator.check_schema(schema)
+    except SchemaError as e:
+        raise SystemExit(f"スキーマが不正です: {e.message}")
+    return Draft202012Validator(schema, format_checker=FormatChecker())
+
+
+def print_validation_error(path_str: str, message: str, rule: Any) -> None:
+    """スキーマ検証エラーを出力する"""
+    print(f"✗ スキーマ検証エラー")
+    print(f"  パス: {path_str}")
+    print(f"  メッセージ: {message}")
+    if rule:
+        print(f"  検証ルール: {rule}")
+
+
+def validate_uigf(validator: Any, data: Dict[str, Any]) -> bool:
+    """
+    UIGF v4.1 JSON を構築済みバリデータで検証する
     
     戻り値:
       True: 検証成功
       False: 検証失敗（エラーメッセージは既に出力済み）
     """
+    # fastjsonschema のバリデータはコンパイル済みの関数
+    if callable(validator):
+        try:
+            validator(data)
+            return True
+        except fastjsonschema.JsonSchemaValueException as e:
+            # e.path の先頭は "data"（ルート）
+            path_str = "/".join(str(p) for p in e.path[1:]) or "root"
+            print_validation_error(path_str, e.message, e.rule)
+            return False
+    
     try:
-        validate(instance=data, schema=schema)
+        validator.validate(data)
         return True
     except ValidationError as e:
         path_str = "/".join(str(p) for p in e.absolute_path) if e.absolute_path else "root"
-        print(f"✗ スキーマ検証エラー")
-        print(f"  パス: {path_str}")
-        print(f"  メッセージ: {e.message}")
-        if e.validator:
-            print(f"  検証ルール: {e.validator}")
+        print_validation_error(path_str, e.message, e.validator)
         return False
 
 
@@ -66,28 +129,33 @@ def main():
         epilog="""
 使用例:
   python validate-uigf-v41.py uigf-v4.1.schema.json uigf_v41.json
+  python validate-uigf-v41.py uigf-v4.1.schema.json a.json b.json c.json
         """,
     )
     parser.add_argument("schema", help="UIGF v4.1 スキーマ JSON ファイル")
-    parser.add_argument("data", help="検証したい UIGF v4.1 JSON ファイル")
+    parser.add_argument("data", nargs="+", help="検証したい UIGF v4.1 JSON ファイル（複数指定可）")
     
     args = parser.parse_args()
     
-    # スキーマ・データを読み込む
+    # スキーマを読み込み、バリデータを一度だけ構築
     print(f"スキーマ読み込み: {args.schema}")
     schema = load_json(args.schema)
+    validator = build_validator(schema)
     
-    print(f"データ読み込み: {args.data}")
-    data = load_json(args.data)
+    failed = 0
+    for path in args.data:
+        print(f"データ読み込み: {path}")
+        data = load_json(path)
+        
+        # 検証実行
+        print("\n検証中...\n")
+        if validate_uigf(validator, data):
+            print("✓ スキーマ v4.1 に準拠しています\n")
+        else:
+            print()
+            failed += 1
     
-    # 検証実行
-    print("\n検証中...\n")
-    if validate_uigf(schema, data):
-        print("✓ スキーマ v4.1 に準拠しています\n")
-        return 0
-    else:
-        print()
-        return 1
+    return 1 if failed else 0
 
 
 if __name__ == "__main__":